@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    total += _tree_size(entry.path)
+                else:
+                    total += entry.stat().st_size
+            except OSError:
+                pass
+    return total
+
+
+def dir_size(path: Path) -> int:
+    with os.scandir(path) as it:
+        entries = list(it)
+    subdirs = [e.path for e in entries if e.is_dir()]
+    total = sum(e.stat().st_size for e in entries if not e.is_dir())
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        total += sum(pool.map(_tree_size, subdirs))
+    return total
+
+
+def _link_file(src: str, dst: str) -> None:
+    real = os.path.realpath(src)
+    try:
+        os.link(real, dst)
+    except OSError:
+        shutil.copy2(real, dst)
+
+
+def copy_tree(src: Path, dest: Path, hardlink: bool = False) -> str:
+    if hardlink:
+        shutil.copytree(src, dest, symlinks=False, copy_function=_link_file)
+        return "hardlinked"
+
+    if sys.platform == "darwin":
+        cmd = ["cp", "-c", "-R", "-L", str(src), str(dest)]
+    else:
+        cmd = ["cp", "--reflink=auto", "-R", "-L", str(src), str(dest)]
+    try:
+        if subprocess.run(cmd, check=False).returncode == 0:
+            return "cloned"
+    except OSError:
+        pass
+
+    shutil.rmtree(dest, ignore_errors=True)
+    shutil.copytree(src, dest, symlinks=False)
+    return "copied"
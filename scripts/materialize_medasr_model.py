@@ -2,11 +2,10 @@
 from __future__ import annotations
 
 import argparse
-import os
-import shutil
-import sys
 from pathlib import Path
 
+from _materialize import copy_tree, dir_size
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -22,6 +21,11 @@ def main() -> None:
         default="models/medasr",
         help="Destination directory under the repo (default: models/medasr)",
     )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="Hardlink files from the HF cache instead of copying (same filesystem only)",
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parents[1]
@@ -34,6 +38,10 @@ def main() -> None:
             "huggingface_hub is required in the active environment. Run ./setup.sh first."
         ) from e
 
+    if dest.exists():
+        print(f"Already exists: {dest}")
+        return
+
     print(f"Locating cached snapshot for {args.repo_id}…", flush=True)
     snapshot_dir = Path(
         snapshot_download(repo_id=args.repo_id, local_files_only=True)
@@ -42,23 +50,13 @@ def main() -> None:
     if not snapshot_dir.exists():
         raise SystemExit(f"Snapshot not found locally for {args.repo_id}.")
 
-    if dest.exists():
-        print(f"Already exists: {dest}")
-        return
-
     dest.parent.mkdir(parents=True, exist_ok=True)
 
     print(f"Copying {snapshot_dir} -> {dest} (no symlinks)…", flush=True)
-    shutil.copytree(snapshot_dir, dest, symlinks=False)
+    how = copy_tree(snapshot_dir, dest, hardlink=args.hardlink)
 
-    size_mb = 0
-    for root, _, files in os.walk(dest):
-        for name in files:
-            try:
-                size_mb += os.path.getsize(os.path.join(root, name))
-            except OSError:
-                pass
-    print(f"Done. Copied ~{size_mb / (1024 * 1024):.1f} MB")
+    size_mb = dir_size(dest)
+    print(f"Done. {how.capitalize()} ~{size_mb / (1024 * 1024):.1f} MB")
 
 
 if __name__ == "__main__":
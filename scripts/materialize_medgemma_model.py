@@ -2,10 +2,11 @@
 from __future__ import annotations
 
 import argparse
-import os
 import shutil
 from pathlib import Path
 
+from _materialize import copy_tree, dir_size
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -21,6 +22,11 @@ def main() -> None:
         default="models/medgemma",
         help="Destination directory under the repo (default: models/medgemma)",
     )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="Hardlink files from the HF cache instead of copying (same filesystem only)",
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parents[1]
@@ -36,6 +42,15 @@ def main() -> None:
     if dest.exists():
         print(f"Already exists: {dest}")
 
+        missing = [
+            name
+            for name in ("preprocessor_config.json", "processor_config.json")
+            if not (dest / name).exists()
+        ]
+        if not missing:
+            print("Processor files present; nothing to do.")
+            return
+
         print(f"Syncing missing processor files into {dest}…", flush=True)
 
         print(f"Locating cached snapshot for {args.repo_id}…", flush=True)
@@ -43,11 +58,9 @@ def main() -> None:
             snapshot_download(repo_id=args.repo_id, local_files_only=True)
         ).resolve()
 
-        for name in ("preprocessor_config.json", "processor_config.json"):
+        for name in missing:
             src = snapshot_dir / name
             dst = dest / name
-            if dst.exists():
-                continue
             if not src.exists():
                 raise SystemExit(
                     f"Missing {name} in cached snapshot for {args.repo_id}."
@@ -68,7 +81,7 @@ def main() -> None:
     dest.parent.mkdir(parents=True, exist_ok=True)
 
     print(f"Copying {snapshot_dir} -> {dest} (no symlinks)…", flush=True)
-    shutil.copytree(snapshot_dir, dest, symlinks=False)
+    how = copy_tree(snapshot_dir, dest, hardlink=args.hardlink)
 
     for name in ("preprocessor_config.json", "processor_config.json"):
         src = snapshot_dir / name
@@ -80,14 +93,8 @@ def main() -> None:
         shutil.copy2(src, dst)
         print(f"Copied {name}")
 
-    total_bytes = 0
-    for root, _, files in os.walk(dest):
-        for name in files:
-            try:
-                total_bytes += os.path.getsize(os.path.join(root, name))
-            except OSError:
-                pass
-    print(f"Done. Copied ~{total_bytes / (1024 * 1024):.1f} MB")
+    total_bytes = dir_size(dest)
+    print(f"Done. {how.capitalize()} ~{total_bytes / (1024 * 1024):.1f} MB")
 
 
 if __name__ == "__main__":
@@ -47,7 +47,7 @@ echo "Installing ASR dependencies (Python 3.11)..."
 
 echo ""
 echo "Installing QA/TTS dependencies (Python 3.14)..."
-( source .venv314/bin/activate; uv pip install torch transformers accelerate pyyaml scipy pocket-tts protobuf sentencepiece pillow )
+( source .venv314/bin/activate; uv pip install torch transformers accelerate pyyaml scipy pocket-tts sounddevice protobuf sentencepiece pillow )
 
 if [ ! -d "models/medasr" ]; then
   echo ""
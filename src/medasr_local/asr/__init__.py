@@ -3,4 +3,5 @@ __all__ = [
     "io",
     "lm",
     "model",
+    "model_ort",
 ]
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import contextlib
+import multiprocessing
+import os
+import re
 from dataclasses import dataclass
 from typing import Any
 
@@ -14,11 +18,24 @@ class DecodeConfig:
     use_lm: bool
 
 
+# Applied after spaces are dropped, so word breaks are still "#" here and
+# "{new paragraph}" is spelled "{new#paragraph}".
+_RESTORE_MAP = {
+    "#": " ",
+    "</s>": "",
+    "{period}": ".",
+    "{comma}": ",",
+    "{colon}": ":",
+    "{new#paragraph}": "\n\n",
+}
+_RESTORE_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(_RESTORE_MAP, key=len, reverse=True))
+)
+
+
 def _restore_text(text: str) -> str:
-    text = text.replace(" ", "").replace("#", " ").replace("</s>", "").strip()
-    text = text.replace("{period}", ".").replace("{comma}", ",")
-    text = text.replace("{colon}", ":").replace("{new paragraph}", "\n\n")
-    return text
+    text = text.replace(" ", "")
+    return _RESTORE_RE.sub(lambda m: _RESTORE_MAP[m.group(0)], text).strip()
 
 
 def _decode_with_lm(decoder: Any, logits: np.ndarray) -> str:
@@ -26,12 +43,84 @@ def _decode_with_lm(decoder: Any, logits: np.ndarray) -> str:
     return _restore_text(text)
 
 
+class LmPool:
+    # pyctcdecode shares the KenLM model with workers only through fork. The
+    # pool is forked on the first batch that needs it, so single-window runs
+    # never fork; the owner calls close() on shutdown.
+    def __init__(self) -> None:
+        self._pool = None
+
+    def get(self):
+        if self._pool is None and "fork" in multiprocessing.get_all_start_methods():
+            # Forked children must not touch the tokenizers thread pool.
+            os.environ["TOKENIZERS_PARALLELISM"] = "false"
+            ctx = multiprocessing.get_context("fork")
+            self._pool = ctx.Pool(max(1, (os.cpu_count() or 2) // 2))
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+
+def _decode_batch_with_lm(
+    decoder: Any, logits: list[np.ndarray], pool: LmPool | None
+) -> list[str]:
+    workers = pool.get() if pool is not None and len(logits) >= 2 else None
+    if workers is None:
+        return [_decode_with_lm(decoder, x) for x in logits]
+    texts = decoder.decode_batch(workers, logits)
+    return [_restore_text(t) for t in texts]
+
+
 def _decode_greedy(processor: Any, logits: torch.Tensor) -> str:
-    pred_ids = torch.argmax(logits, dim=-1)
+    # Only the int ids cross to the host, not the full logit matrix.
+    pred_ids = torch.argmax(logits, dim=-1).to("cpu")
     text = processor.batch_decode(pred_ids)[0]
     return _restore_text(text)
 
 
+def _to_device(bundle: Any, inputs: Any) -> dict[str, Any]:
+    device = bundle.device
+    staged: dict[str, Any] = {}
+    for key, value in inputs.items():
+        if not isinstance(value, torch.Tensor):
+            staged[key] = value
+            continue
+        dtype = bundle.dtype if value.is_floating_point() else value.dtype
+        if device != "cuda":
+            staged[key] = value.to(device, dtype=dtype)
+            continue
+        buf = bundle.staging.get(key)
+        if buf is None or buf.dtype != value.dtype or buf.numel() < value.numel():
+            buf = torch.empty(value.numel(), dtype=value.dtype, pin_memory=True)
+            bundle.staging[key] = buf
+        host = buf[: value.numel()].view(value.shape)
+        host.copy_(value)
+        staged[key] = host.to(device, dtype=dtype, non_blocking=True)
+    return staged
+
+
+def _forward(bundle: Any, inputs: dict[str, Any]) -> torch.Tensor:
+    amp = bundle.autocast_dtype
+    if amp is None:
+        ctx = contextlib.nullcontext()
+    else:
+        ctx = torch.autocast(device_type=bundle.device, dtype=amp)
+    if bundle.cudagraphs:
+        torch.compiler.cudagraph_mark_step_begin()
+    with torch.inference_mode(), ctx:
+        out = bundle.model(**inputs)
+    logits = out.logits.float()
+    if bundle.cudagraphs:
+        # The graph's output buffer is overwritten by the next replay, and
+        # .float() on fp32 logits returns that same buffer.
+        logits = logits.clone()
+    return logits
+
+
 def transcribe_audio(
     audio: np.ndarray,
     sample_rate: int,
@@ -39,19 +128,16 @@ def transcribe_audio(
     decoder: Any | None,
 ) -> str:
     processor = bundle.processor
-    model = bundle.model
-    device = bundle.device
 
     inputs = processor(
         audio,
         sampling_rate=sample_rate,
         return_tensors="pt",
         padding=True,
-    ).to(device)
+    )
+    inputs = _to_device(bundle, inputs)
 
-    with torch.no_grad():
-        out = model(**inputs)
-        logits = out.logits
+    logits = _forward(bundle, inputs)
 
     if decoder is not None:
         return _decode_with_lm(decoder, logits[0].detach().to("cpu").numpy())
@@ -59,22 +145,87 @@ def transcribe_audio(
     return _decode_greedy(processor, logits)
 
 
+def _attention_mask(inputs: Any, chunks: list[np.ndarray]) -> torch.Tensor:
+    mask = inputs.get("attention_mask")
+    if mask is not None:
+        return mask
+    # Raw-waveform extractors pad sample for sample.
+    width = next(v for v in inputs.values() if isinstance(v, torch.Tensor)).shape[1]
+    lengths = torch.tensor([len(c) for c in chunks])
+    return (torch.arange(width)[None, :] < lengths[:, None]).long()
+
+
+def _output_lengths(model: Any, lengths: torch.Tensor, n_frames: int) -> list[int]:
+    to_frames = getattr(model, "_get_feat_extract_output_lengths", None)
+    if to_frames is not None:
+        out = to_frames(lengths).tolist()
+    else:
+        longest = int(lengths.max())
+        out = [max(1, n_frames * n // longest) for n in lengths.tolist()]
+    return [min(n_frames, int(n)) for n in out]
+
+
+def transcribe_batch(
+    chunks: list[np.ndarray],
+    sample_rate: int,
+    bundle: Any,
+    decoder: Any | None,
+    pool: LmPool | None = None,
+) -> list[str]:
+    processor = bundle.processor
+
+    inputs = processor(
+        chunks,
+        sampling_rate=sample_rate,
+        return_tensors="pt",
+        padding=True,
+        return_attention_mask=True,
+    )
+    # Rows are padded to the longest one, so the model always gets the mask.
+    mask = _attention_mask(inputs, chunks)
+    inputs["attention_mask"] = mask
+    lengths = mask.sum(dim=-1)
+    inputs = _to_device(bundle, inputs)
+
+    logits = _forward(bundle, inputs)
+
+    # Each row's valid frames on the logit time axis.
+    frames = _output_lengths(bundle.model, lengths, logits.shape[1])
+
+    if decoder is not None:
+        host = logits.detach().to("cpu").numpy()
+        return _decode_batch_with_lm(
+            decoder, [host[i, :n] for i, n in enumerate(frames)], pool
+        )
+
+    pred_ids = torch.argmax(logits, dim=-1).to("cpu")
+    texts = processor.batch_decode([pred_ids[i, :n] for i, n in enumerate(frames)])
+    return [_restore_text(t) for t in texts]
+
+
 def transcribe_segments(
     samples: np.ndarray,
     sample_rate: int,
     segments: list[tuple[int, int]],
     bundle: Any,
     decoder: Any | None,
+    batch_size: int = 8,
+    pool: LmPool | None = None,
 ) -> list[Segment]:
-    out: list[Segment] = []
+    kept = [(s, e) for s, e in segments if e > s and (e - s) >= int(sample_rate * 0.15)]
+
+    # Sort by length so each batch pads to a similar duration.
+    order = sorted(range(len(kept)), key=lambda i: kept[i][1] - kept[i][0])
+    texts: list[str] = [""] * len(kept)
+    for b in range(0, len(order), batch_size):
+        idx = order[b : b + batch_size]
+        chunks = [samples[kept[i][0] : kept[i][1]] for i in idx]
+        batch = transcribe_batch(chunks, sample_rate, bundle, decoder, pool)
+        for i, text in zip(idx, batch):
+            texts[i] = text
 
-    for s, e in segments:
-        if e <= s:
-            continue
-        chunk = samples[s:e]
-        if chunk.size < int(sample_rate * 0.15):
-            continue
-        text = transcribe_audio(chunk, sample_rate, bundle, decoder)
+    out: list[Segment] = []
+    for (s, e), text in zip(kept, texts):
         if not text:
             continue
         out.append(Segment(start_s=s / sample_rate, end_s=e / sample_rate, text=text))
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import subprocess
-import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 
 import numpy as np
 from scipy.io import wavfile
 
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 
 @dataclass(frozen=True)
 class AudioData:
@@ -15,26 +21,31 @@ class AudioData:
     samples: np.ndarray
 
 
-def extract_to_wav(input_path: Path) -> Path:
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    tmp_path = Path(tmp.name)
-    tmp.close()
+def pcm_to_float32(
+    pcm: np.ndarray, scale: float, out: np.ndarray | None = None
+) -> np.ndarray:
+    samples = np.empty(pcm.shape, dtype=np.float32) if out is None else out
+    np.multiply(pcm, scale, out=samples, dtype=np.float32, casting="unsafe")
+    return samples
 
+
+def extract_audio(input_path: Path, sample_rate: int = 16000) -> AudioData:
     cmd = [
         "ffmpeg",
         "-i",
         str(input_path),
         "-ar",
-        "16000",
+        str(sample_rate),
         "-ac",
         "1",
         "-f",
-        "wav",
-        "-y",
-        str(tmp_path),
+        "s16le",
+        "-",
     ]
-    subprocess.run(cmd, check=True, capture_output=True)
-    return tmp_path
+    proc = subprocess.run(cmd, check=True, capture_output=True)
+    pcm = np.frombuffer(proc.stdout, dtype=np.int16)
+    samples = pcm_to_float32(pcm, 1.0 / 32768.0)
+    return AudioData(sample_rate=sample_rate, samples=samples)
 
 
 def read_wav(path: Path) -> AudioData:
@@ -44,13 +55,12 @@ def read_wav(path: Path) -> AudioData:
         audio = audio[:, 0]
 
     if audio.dtype == np.int16:
-        samples = audio.astype(np.float32) / 32768.0
+        samples = pcm_to_float32(audio, 1.0 / 32768.0)
     elif audio.dtype == np.int32:
-        samples = audio.astype(np.float32) / 2147483648.0
-    elif audio.dtype == np.float32:
-        samples = audio
+        samples = pcm_to_float32(audio, 1.0 / 2147483648.0)
     else:
-        samples = audio.astype(np.float32)
+        # A first-channel slice is strided; chunks should be plain views.
+        samples = np.ascontiguousarray(audio, dtype=np.float32)
 
     return AudioData(sample_rate=int(sample_rate), samples=samples)
 
@@ -61,7 +71,55 @@ def _frame_rms(samples: np.ndarray, frame_len: int) -> np.ndarray:
     n = len(samples) // frame_len
     trimmed = samples[: n * frame_len]
     frames = trimmed.reshape(n, frame_len)
-    return np.sqrt(np.mean(frames * frames, axis=1)).astype(np.float32)
+    rms = np.empty(n, dtype=np.float32)
+    np.einsum("ij,ij->i", frames, frames, out=rms, casting="same_kind")
+    rms *= 1.0 / frame_len
+    np.sqrt(rms, out=rms)
+    return rms
+
+
+@njit(cache=True)
+def _segment_frames(
+    rms: np.ndarray,
+    rms_threshold: float,
+    min_speech_frames: int,
+    min_silence_frames: int,
+    max_segment_frames: int,
+) -> np.ndarray:
+    n = rms.shape[0]
+    out = np.empty((n // 2 + 1, 2), dtype=np.int32)
+    k = 0
+
+    i = 0
+    while i < n:
+        while i < n and rms[i] < rms_threshold:
+            i += 1
+        if i >= n:
+            break
+
+        start = i
+        silence = 0
+        end = i
+
+        while end < n:
+            if rms[end] >= rms_threshold:
+                silence = 0
+            else:
+                silence += 1
+                if silence >= min_silence_frames:
+                    break
+            if (end - start) >= max_segment_frames:
+                break
+            end += 1
+
+        if end - start >= min_speech_frames:
+            out[k, 0] = start
+            out[k, 1] = end
+            k += 1
+
+        i = end + 1
+
+    return out[:k]
 
 
 def vad_segments(
@@ -81,53 +139,27 @@ def vad_segments(
     if rms.size == 0:
         return []
 
-    speech = rms >= rms_threshold
-
     min_speech_frames = max(1, int(min_speech_ms / frame_ms))
     min_silence_frames = max(1, int(min_silence_ms / frame_ms))
     max_segment_frames = max(1, int(max_segment_s * 1000 / frame_ms))
 
-    segments: list[tuple[int, int]] = []
+    frames = _segment_frames(
+        rms,
+        np.float32(rms_threshold),
+        min_speech_frames,
+        min_silence_frames,
+        max_segment_frames,
+    )
 
-    i = 0
-    n = len(speech)
-    while i < n:
-        while i < n and not speech[i]:
-            i += 1
-        if i >= n:
-            break
-
-        start = i
-        silence = 0
-        end = i
-
-        while end < n:
-            if speech[end]:
-                silence = 0
-            else:
-                silence += 1
-                if silence >= min_silence_frames:
-                    break
-            if (end - start) >= max_segment_frames:
-                break
-            end += 1
-
-        seg_len = end - start
-        if seg_len >= min_speech_frames:
-            s = start * frame_len
-            e = min(len(samples), end * frame_len)
-            segments.append((s, e))
-
-        i = end + 1
+    n_samples = len(samples)
+    max_gap = int(0.15 * sample_rate)
 
     merged: list[tuple[int, int]] = []
-    for s, e in segments:
-        if not merged:
-            merged.append((s, e))
-            continue
-        ps, pe = merged[-1]
-        gap = s - pe
-        if gap <= int(0.15 * sample_rate):
+    for start, end in frames.tolist():
+        s = start * frame_len
+        e = min(n_samples, end * frame_len)
+        if merged and s - merged[-1][1] <= max_gap:
+            ps, pe = merged[-1]
             merged[-1] = (ps, max(pe, e))
         else:
             merged.append((s, e))
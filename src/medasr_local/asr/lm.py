@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import lru_cache
+from operator import itemgetter
 from typing import Any
 
 
@@ -8,27 +10,45 @@ def labels_from_tokenizer(tokenizer: Any) -> list[str]:
     if not vocab:
         raise ValueError("Tokenizer vocab is empty")
 
-    max_id = max(vocab.values())
-    labels: list[str | None] = [None] * (max_id + 1)
+    items = sorted(vocab.items(), key=itemgetter(1))
 
-    for token, token_id in vocab.items():
-        if token_id < 0 or token_id > max_id:
-            raise ValueError(f"Invalid token id: {token_id}")
-        if labels[token_id] is not None:
-            raise ValueError(f"Duplicate token id in vocab: {token_id}")
-        labels[token_id] = token
+    labels: list[str] = []
+    for expected, (token, token_id) in enumerate(items):
+        if token_id != expected:
+            if token_id < 0:
+                raise ValueError(f"Invalid token id: {token_id}")
+            if token_id < expected:
+                raise ValueError(f"Duplicate token id in vocab: {token_id}")
+            missing = list(range(expected, token_id))
+            raise ValueError(f"Tokenizer vocab missing ids: {missing[:10]}")
+        labels.append(token)
 
-    missing = [i for i, v in enumerate(labels) if v is None]
-    if missing:
-        raise ValueError(f"Tokenizer vocab missing ids: {missing[:10]}")
+    return labels
 
-    return [v for v in labels if v is not None]
+
+@lru_cache(maxsize=4)
+def _decoder_for(labels: tuple[str, ...], kenlm_model_path: str):
+    from pyctcdecode import build_ctcdecoder
+
+    return build_ctcdecoder(labels=list(labels), kenlm_model_path=kenlm_model_path)
 
 
 def build_kenlm_decoder(processor: Any, model: Any, kenlm_model_path: str):
-    from pyctcdecode import build_ctcdecoder
+    return _build_decoder(processor, model.config.vocab_size, kenlm_model_path)
+
+
+def load_kenlm_decoder(model_name: str, kenlm_model_path: str):
+    # Needs only the tokenizer and config, so the decoder (and its KenLM model)
+    # is built without the ASR weights and is inherited by a forked LmPool.
+    from transformers import AutoConfig, AutoProcessor
+
+    kwargs = {"local_files_only": True}
+    processor = AutoProcessor.from_pretrained(model_name, **kwargs)
+    config = AutoConfig.from_pretrained(model_name, **kwargs)
+    return _build_decoder(processor, config.vocab_size, kenlm_model_path)
+
 
-    vocab_size = model.config.vocab_size
+def _build_decoder(processor: Any, vocab_size: int, kenlm_model_path: str):
     all_labels = labels_from_tokenizer(processor.tokenizer)
     labels = all_labels[:vocab_size]
 
@@ -45,4 +65,4 @@ def build_kenlm_decoder(processor: Any, model: Any, kenlm_model_path: str):
             piece = "\u2581" + piece.replace("\u2581", "#")
         labels[i] = piece
 
-    return build_ctcdecoder(labels=labels, kenlm_model_path=kenlm_model_path)
+    return _decoder_for(tuple(labels), kenlm_model_path)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import torch
 from transformers import AutoModelForCTC, AutoProcessor
@@ -11,6 +11,19 @@ class AsrBundle:
     model: torch.nn.Module
     processor: object
     device: str
+    dtype: torch.dtype = torch.float32
+    autocast_dtype: torch.dtype | None = None
+    cudagraphs: bool = False
+    staging: dict[str, torch.Tensor] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+
+PRECISIONS = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
 
 
 def pick_device(explicit: str | None) -> str:
@@ -23,13 +36,59 @@ def pick_device(explicit: str | None) -> str:
     return "cpu"
 
 
-def load_asr(model_name: str, device: str | None = None) -> AsrBundle:
+def _enable_tf32() -> None:
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+
+
+def load_asr(
+    model_name: str,
+    device: str | None = None,
+    precision: str = "fp32",
+    int8: bool = False,
+    autocast: bool = False,
+    fixed_shapes: bool = False,
+) -> AsrBundle:
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+
     kwargs = {"local_files_only": True}
     processor = AutoProcessor.from_pretrained(model_name, **kwargs)
     model = AutoModelForCTC.from_pretrained(model_name, **kwargs)
 
     chosen = pick_device(device)
-    model = model.to(chosen)
+    if chosen == "cuda":
+        _enable_tf32()
+        # Autotuning only pays off when every call sees the same input shape.
+        torch.backends.cudnn.benchmark = fixed_shapes
+    dtype = PRECISIONS[precision] if chosen in ("cuda", "mps") else torch.float32
+    model = model.to(chosen, dtype=dtype)
     model.eval()
 
-    return AsrBundle(model=model, processor=processor, device=chosen)
+    if chosen == "cuda":
+        # reduce-overhead records a CUDA graph per input shape, so it is only
+        # used for fixed-length streaming windows. Variable-length batches
+        # (transcribe_segments) get a plain dynamic-shape compile instead.
+        if fixed_shapes:
+            model.forward = torch.compile(model.forward, mode="reduce-overhead")
+        else:
+            model.forward = torch.compile(model.forward, dynamic=True)
+
+    if int8 and chosen == "cpu":
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    autocast_dtype = None
+    if autocast and chosen in ("cuda", "mps") and dtype == torch.float32:
+        autocast_dtype = torch.float16
+
+    return AsrBundle(
+        model=model,
+        processor=processor,
+        device=chosen,
+        dtype=dtype,
+        autocast_dtype=autocast_dtype,
+        cudagraphs=chosen == "cuda" and fixed_shapes,
+    )
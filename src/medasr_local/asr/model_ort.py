@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import torch
+from transformers import AutoProcessor
+
+from medasr_local.asr.model import AsrBundle
+
+_ONNX_FILE = "model.onnx"
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def _ort_dir(model_name: str, int8: bool) -> Path:
+    src = Path(model_name)
+    return src.with_name(f"{src.name}_{'int8' if int8 else 'onnx'}")
+
+
+def _export(model_name: str, save_dir: Path, provider: str) -> None:
+    from optimum.onnxruntime import ORTModelForCTC
+
+    model = ORTModelForCTC.from_pretrained(
+        model_name, export=True, provider=provider, local_files_only=True
+    )
+    model.save_pretrained(save_dir)
+
+
+def _quantize(model_name: str, save_dir: Path, provider: str) -> None:
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    fp32_dir = _ort_dir(model_name, int8=False)
+    if not (fp32_dir / _ONNX_FILE).exists():
+        _export(model_name, fp32_dir, provider)
+
+    quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=_ONNX_FILE)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+    quantizer.quantize(save_dir=save_dir, quantization_config=qconfig)
+
+
+def load_asr_ort(
+    model_name: str,
+    device: str | None = None,
+    int8: bool = False,
+) -> AsrBundle:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForCTC
+
+    # Dynamic int8 GEMMs only run on the CPU provider.
+    use_cuda = torch.cuda.is_available() and not int8
+    chosen = device or ("cuda" if use_cuda else "cpu")
+    if chosen not in ("cpu", "cuda"):
+        raise ValueError(f"ONNX Runtime backend does not support device: {chosen}")
+    provider = "CUDAExecutionProvider" if chosen == "cuda" else "CPUExecutionProvider"
+
+    save_dir = _ort_dir(model_name, int8)
+    file_name = _QUANTIZED_FILE if int8 else _ONNX_FILE
+    if not (save_dir / file_name).exists():
+        if int8:
+            _quantize(model_name, save_dir, provider)
+        else:
+            _export(model_name, save_dir, provider)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    processor = AutoProcessor.from_pretrained(model_name, local_files_only=True)
+    model = ORTModelForCTC.from_pretrained(
+        save_dir,
+        file_name=file_name,
+        provider=provider,
+        session_options=options,
+        local_files_only=True,
+    )
+
+    return AsrBundle(model=model, processor=processor, device=chosen)
@@ -3,7 +3,8 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from medasr_local.qa.medgemma import MedGemma, load_transcript_text
+from medasr_local.cli.config import load_config
+from medasr_local.qa.medgemma import QUANT_MODES, MedGemma, load_transcript_text
 
 
 def main() -> None:
@@ -14,6 +15,18 @@ def main() -> None:
     )
     parser.add_argument("-c", "--context-words", type=int, default=2000)
     parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument(
+        "--quant",
+        choices=QUANT_MODES,
+        default="none",
+        help="Weight quantization (int8: CUDA bitsandbytes or CPU dynamic; nf4: CUDA)",
+    )
+    parser.add_argument(
+        "--prompt-cache",
+        type=Path,
+        default=None,
+        help="Reuse the transcript prefix KV cache saved at this path across runs",
+    )
     args = parser.parse_args()
 
     transcript_path = Path(args.transcript)
@@ -30,9 +43,7 @@ def main() -> None:
     config_path = Path(__file__).resolve().parents[3] / "config.yaml"
     if config_path.exists():
         try:
-            import yaml
-
-            cfg = yaml.safe_load(config_path.read_text())
+            cfg = load_config(config_path)
             model_name = cfg.get("models", {}).get("medgemma", model_name)
         except Exception:
             pass
@@ -46,14 +57,18 @@ def main() -> None:
             "MedGemma model not found locally. Run: .venv314/bin/python scripts/materialize_medgemma_model.py --out models/medgemma"
         )
 
-    qa = MedGemma(model_name=model_name)
+    qa = MedGemma(model_name=model_name, quant=args.quant)
 
     if args.question:
+        if args.prompt_cache is not None:
+            qa.prime(context, cache_path=args.prompt_cache)
         print(f"\nQuestion: {args.question}")
         print("\nMedGemma: ", end="", flush=True)
         answer = qa.ask(context, args.question, max_tokens=args.max_tokens)
         print(answer)
     else:
+        qa.prime(context, cache_path=args.prompt_cache)
+
         print("\n=== MedGemma Q&A Chat ===")
         print("Type your questions. Type 'quit' or 'exit' to end.\n")
 
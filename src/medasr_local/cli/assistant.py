@@ -4,17 +4,125 @@ import argparse
 import json
 import os
 import queue
+import re
 import subprocess
 import threading
 import time
+from collections import deque
 from pathlib import Path
 
 import numpy as np
 import sounddevice as sd
 
-from medasr_local.asr.decode import transcribe_audio
-from medasr_local.asr.lm import build_kenlm_decoder
+from medasr_local.asr.decode import LmPool, transcribe_audio, transcribe_batch
+from medasr_local.asr.lm import load_kenlm_decoder
 from medasr_local.asr.model import load_asr
+from medasr_local.cli.config import load_config
+from medasr_local.cli.ipc import read_jsonl
+
+# Backlogs are padded up to one of these so the cudagraphs and cudnn plans
+# recorded for fixed_shapes=True are reused instead of re-recorded per size.
+_BATCH_SIZES = (1, 2, 4, 8)
+_QUESTION_RE = re.compile(
+    r"^\s*(?:what|how|why|when|where|who|which|can|could|would|should"
+    r"|is|are|does|do)|\?\s*$",
+    re.IGNORECASE,
+)
+
+
+class _Worker:
+    def __init__(self, cmd: list[str], env: dict[str, str]):
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            env=env,
+        )
+        self._next_id = 0
+
+        while True:
+            event = self._read()
+            if event.get("type") == "error":
+                self.close()
+                raise RuntimeError(event.get("detail") or event.get("message"))
+            if event.get("type") == "status" and event.get("message") == "ready":
+                return
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _read(self) -> dict:
+        while True:
+            try:
+                event = read_jsonl(self.proc.stdout)
+            except ValueError:
+                continue
+            if event is None:
+                raise RuntimeError(f"worker exited {self.proc.wait()}")
+            return event
+
+    def request(self, req: dict) -> dict:
+        self._next_id += 1
+        req_id = f"q{self._next_id}"
+        req = {"id": req_id, **req}
+        self.proc.stdin.write(json.dumps(req, ensure_ascii=False) + "\n")
+        self.proc.stdin.flush()
+
+        while True:
+            event = self._read()
+            if event.get("id") != req_id:
+                continue
+            if event.get("type") == "error":
+                raise RuntimeError(event.get("detail") or event.get("message"))
+            return event
+
+    def close(self) -> None:
+        if self.proc.stdin:
+            self.proc.stdin.close()
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class _QAWorker(_Worker):
+    def __init__(self, qa_python: Path, model: str, repo_root: Path):
+        env = os.environ.copy()
+        env["PYTHONPATH"] = str((repo_root / "src").resolve())
+        env["TOKENIZERS_PARALLELISM"] = "false"
+        env["HF_HUB_DISABLE_TELEMETRY"] = "1"
+        env["TRANSFORMERS_VERBOSITY"] = "error"
+        env["HF_HUB_OFFLINE"] = "1"
+        env["TRANSFORMERS_OFFLINE"] = "1"
+
+        super().__init__(
+            [
+                str(qa_python),
+                "-u",
+                "-m",
+                "medasr_local.cli.qa_service",
+                "--model",
+                model,
+            ],
+            env,
+        )
+
+    def ask(self, context: str, question: str, max_tokens: int) -> str:
+        event = self.request(
+            {"context": context, "question": question, "max_tokens": max_tokens}
+        )
+        return str(event.get("answer") or "").strip()
+
+
+class _SpeechWorker(_Worker):
+    def __init__(self, speak_bin: Path, voice: str):
+        super().__init__(
+            [str(speak_bin), "--serve", "--voice", voice], os.environ.copy()
+        )
+
+    def say(self, text: str) -> None:
+        self.request({"text": text})
 
 
 class LiveAssistant:
@@ -29,6 +137,9 @@ class LiveAssistant:
         speak_bin: Path,
         voice: str,
         chunk_s: float,
+        precision: str = "fp32",
+        int8: bool = False,
+        autocast: bool = False,
     ):
         self.repo_root = repo_root
         self.qa_python = qa_python
@@ -39,80 +150,158 @@ class LiveAssistant:
         self.sample_rate = 16000
         self.chunk_s = chunk_s
         self.chunk_samples = int(self.sample_rate * chunk_s)
+        self._silence = np.zeros(self.chunk_samples, dtype=np.float32)
 
-        self.audio_queue: queue.Queue = queue.Queue()
-        self.audio_buffer = np.array([], dtype=np.float32)
-        self.transcript_buffer: list[str] = []
+        # Single-producer/single-consumer ring between the PortAudio callback
+        # and _process_audio. Each side only advances its own monotonic
+        # counter, so no lock or per-callback allocation is needed.
+        self._cb_ring = np.empty(
+            max(self.chunk_samples * 8, self.sample_rate * 60), dtype=np.float32
+        )
+        self._cb_write = 0
+        self._cb_read = 0
+        self._cb_ready = threading.Event()
+        self.audio_buffer = np.empty(self.chunk_samples * 4, dtype=np.float32)
+        self._read_idx = 0
+        self._write_idx = 0
+        self.transcript_buffer: deque[str] = deque(maxlen=50)
 
         self.is_running = True
         self.is_paused = False
 
-        print("Loading MedASR...")
-        self.asr_bundle = load_asr(model_name)
+        self._qa: _QAWorker | None = None
+        self._tts: _SpeechWorker | None = None
+        self._speech_queue: queue.Queue[str] = queue.Queue()
+
         self.lm_decoder = None
         if use_lm:
-            self.lm_decoder = build_kenlm_decoder(
-                self.asr_bundle.processor, self.asr_bundle.model, str(kenlm_path)
-            )
+            self.lm_decoder = load_kenlm_decoder(model_name, str(kenlm_path))
+        self.lm_pool = LmPool() if self.lm_decoder is not None else None
+
+        print("Loading MedASR...")
+        self.asr_bundle = load_asr(
+            model_name,
+            precision=precision,
+            int8=int8,
+            autocast=autocast,
+            fixed_shapes=True,
+        )
 
     def _audio_callback(self, indata, frames, time_info, status):
         if status:
             print(f"Audio status: {status}")
-        if not self.is_paused:
-            audio = indata[:, 0] if len(indata.shape) > 1 else indata
-            self.audio_queue.put(audio.copy())
-
-    def _process_audio(self):
-        while self.is_running:
-            try:
-                audio = self.audio_queue.get(timeout=0.1)
-                self.audio_buffer = np.concatenate([self.audio_buffer, audio])
-
-                if len(self.audio_buffer) >= self.chunk_samples:
-                    chunk = self.audio_buffer[: self.chunk_samples]
-                    self.audio_buffer = self.audio_buffer[self.chunk_samples // 2 :]
-
-                    text = transcribe_audio(
-                        chunk,
-                        self.sample_rate,
-                        self.asr_bundle,
-                        self.lm_decoder,
-                    )
+        if self.is_paused:
+            return
+        # InputStream is opened with channels=1, so indata is always (frames, 1).
+        audio = indata[:, 0]
+
+        size = len(self._cb_ring)
+        w = self._cb_write
+        n = len(audio)
+        if n > size - (w - self._cb_read):
+            print("Audio status: input overflow (consumer behind)")
+            return
 
-                    if text:
-                        print(f"\r[ASR] {text}")
-                        self.transcript_buffer.append(text)
+        pos = w % size
+        first = min(n, size - pos)
+        np.copyto(self._cb_ring[pos : pos + first], audio[:first])
+        if first < n:
+            np.copyto(self._cb_ring[: n - first], audio[first:])
+        self._cb_write = w + n
+        self._cb_ready.set()
+
+    def _pending_audio(self) -> list[np.ndarray]:
+        if not self._cb_ready.wait(timeout=0.1):
+            return []
+        self._cb_ready.clear()
+
+        size = len(self._cb_ring)
+        r = self._cb_read
+        w = self._cb_write
+        pos = r % size
+        n = w - r
+        first = min(n, size - pos)
+        views = [self._cb_ring[pos : pos + first]]
+        if first < n:
+            views.append(self._cb_ring[: n - first])
+        return views
+
+    def _buffer_audio(self, audio: np.ndarray) -> int:
+        if self._write_idx + len(audio) > len(self.audio_buffer):
+            pending = self._write_idx - self._read_idx
+            self.audio_buffer[:pending] = self.audio_buffer[
+                self._read_idx : self._write_idx
+            ]
+            self._read_idx = 0
+            self._write_idx = pending
+
+        n = min(len(audio), len(self.audio_buffer) - self._write_idx)
+        self.audio_buffer[self._write_idx : self._write_idx + n] = audio[:n]
+        self._write_idx += n
+        return n
+
+    def _transcribe_windows(self, chunks: list[np.ndarray]) -> list[str]:
+        if len(chunks) == 1:
+            return [
+                transcribe_audio(
+                    chunks[0],
+                    self.sample_rate,
+                    self.asr_bundle,
+                    self.lm_decoder,
+                )
+            ]
+        size = next(b for b in _BATCH_SIZES if b >= len(chunks))
+        padded = chunks + [self._silence] * (size - len(chunks))
+        texts = transcribe_batch(
+            padded,
+            self.sample_rate,
+            self.asr_bundle,
+            self.lm_decoder,
+            self.lm_pool,
+        )
+        return texts[: len(chunks)]
 
-                        if self._is_question(text):
-                            self._handle_question(text)
+    def _handle_chunks(self, chunks: list[np.ndarray]) -> None:
+        top = _BATCH_SIZES[-1]
+        texts: list[str] = []
+        for b in range(0, len(chunks), top):
+            texts.extend(self._transcribe_windows(chunks[b : b + top]))
 
-            except queue.Empty:
+        for text in texts:
+            if not text:
                 continue
+            print(f"\r[ASR] {text}")
+            self.transcript_buffer.append(text)
+
+            if self._is_question(text):
+                self._handle_question(text)
+
+    def _consume(self, audio: np.ndarray, hop: int) -> None:
+        while audio.size:
+            audio = audio[self._buffer_audio(audio) :]
+            # A backlog of several windows runs as one batched forward.
+            chunks: list[np.ndarray] = []
+            while self._write_idx - self._read_idx >= self.chunk_samples:
+                start = self._read_idx
+                self._read_idx += hop
+                chunks.append(self.audio_buffer[start : start + self.chunk_samples])
+            if chunks:
+                self._handle_chunks(chunks)
+
+    def _process_audio(self):
+        hop = self.chunk_samples // 2
+        while self.is_running:
+            views = self._pending_audio()
+            try:
+                for audio in views:
+                    self._consume(audio, hop)
             except Exception as e:
                 print(f"Error processing audio: {e}")
+            # Hand the ring space back only once the samples are copied out.
+            self._cb_read += sum(len(v) for v in views)
 
     def _is_question(self, text: str) -> bool:
-        text_lower = text.lower().strip()
-        question_words = [
-            "what",
-            "how",
-            "why",
-            "when",
-            "where",
-            "who",
-            "which",
-            "can",
-            "could",
-            "would",
-            "should",
-            "is",
-            "are",
-            "does",
-            "do",
-        ]
-        return any(
-            text_lower.startswith(w) for w in question_words
-        ) or text.strip().endswith("?")
+        return _QUESTION_RE.search(text) is not None
 
     def _ask_medgemma(self, context: str, question: str, max_tokens: int) -> str:
         if not self.qa_python.exists():
@@ -125,56 +314,37 @@ class LiveAssistant:
                 "MedGemma model not found locally. Run: .venv314/bin/python scripts/materialize_medgemma_model.py --out models/medgemma"
             )
 
-        env = os.environ.copy()
-        env["PYTHONPATH"] = str((self.repo_root / "src").resolve())
-        env["TOKENIZERS_PARALLELISM"] = "false"
-        env["HF_HUB_DISABLE_TELEMETRY"] = "1"
-        env["TRANSFORMERS_VERBOSITY"] = "error"
-        env["HF_HUB_OFFLINE"] = "1"
-        env["TRANSFORMERS_OFFLINE"] = "1"
-
-        payload = json.dumps(
-            {"context": context, "question": question}, ensure_ascii=False
-        )
-
-        proc = subprocess.run(
-            [
-                str(self.qa_python),
-                "-u",
-                "-m",
-                "medasr_local.cli.qa_inline",
-                "--model",
-                self.medgemma_model,
-                "--max-tokens",
-                str(max_tokens),
-            ],
-            input=payload,
-            text=True,
-            capture_output=True,
-            env=env,
-        )
+        if self._qa is None or not self._qa.alive():
+            self._qa = _QAWorker(self.qa_python, self.medgemma_model, self.repo_root)
 
-        if proc.returncode != 0:
-            err = (proc.stderr or "").strip()
-            raise RuntimeError(err if err else f"medgemma exited {proc.returncode}")
-
-        return (proc.stdout or "").strip()
+        try:
+            return self._qa.ask(context, question, max_tokens)
+        except Exception:
+            if not self._qa.alive():
+                self._qa = None
+            raise
 
     def _speak(self, text: str) -> None:
         if not text.strip():
             return
         if not self.speak_bin.exists():
             raise RuntimeError(f"Speak helper not found: {self.speak_bin}")
-        subprocess.run(
-            [str(self.speak_bin), "--voice", self.voice, text],
-            check=False,
-        )
+
+        if self._tts is None or not self._tts.alive():
+            self._tts = _SpeechWorker(self.speak_bin, self.voice)
+
+        try:
+            self._tts.say(text)
+        except Exception:
+            if not self._tts.alive():
+                self._tts = None
+            raise
 
     def _handle_question(self, question: str):
         print(f"\n[QUESTION DETECTED] {question}")
         print("[Thinking...]", flush=True)
 
-        context = " ".join(self.transcript_buffer[-50:])
+        context = " ".join(self.transcript_buffer)
 
         try:
             answer = self._ask_medgemma(context, question, max_tokens=256)
@@ -184,13 +354,20 @@ class LiveAssistant:
 
         print(f"\n[ANSWER] {answer}\n")
 
-        print("[Speaking...]", flush=True)
-        try:
-            self._speak(answer)
-        except Exception as e:
-            print(f"[SPEAK ERROR] {e}")
+        # Speech plays on its own thread so ASR keeps up meanwhile; answers
+        # are queued so they never talk over each other.
+        self._speech_queue.put(answer)
 
-        print("[Ready]")
+    def _speech_loop(self):
+        while True:
+            answer = self._speech_queue.get()
+            print("[Speaking...]", flush=True)
+            try:
+                self._speak(answer)
+            except Exception as e:
+                print(f"[SPEAK ERROR] {e}")
+
+            print("[Ready]")
 
     def run(self):
         print("\n=== MedASR Live Assistant ===")
@@ -199,6 +376,7 @@ class LiveAssistant:
 
         process_thread = threading.Thread(target=self._process_audio, daemon=True)
         process_thread.start()
+        threading.Thread(target=self._speech_loop, daemon=True).start()
 
         try:
             with sd.InputStream(
@@ -212,6 +390,13 @@ class LiveAssistant:
         except KeyboardInterrupt:
             print("\n\nStopping...")
             self.is_running = False
+        finally:
+            if self._qa is not None:
+                self._qa.close()
+            if self._tts is not None:
+                self._tts.close()
+            if self.lm_pool is not None:
+                self.lm_pool.close()
 
 
 def main() -> None:
@@ -233,11 +418,12 @@ def main() -> None:
 
     use_lm_default = False
     chunk_s = 5.0
+    precision = "fp32"
+    int8 = False
+    autocast = False
 
     if config_path.exists():
-        import yaml
-
-        cfg = yaml.safe_load(config_path.read_text()) or {}
+        cfg = load_config(config_path)
 
         models = cfg.get("models", {})
         model_name = models.get("medasr", model_name)
@@ -257,6 +443,9 @@ def main() -> None:
             chunk_s = float(live_cfg.get("chunk_length_s", chunk_s))
         except (TypeError, ValueError):
             pass
+        precision = str(live_cfg.get("precision", precision))
+        int8 = bool(live_cfg.get("int8", int8))
+        autocast = bool(live_cfg.get("autocast", autocast))
 
     use_lm = use_lm_default if args.lm is None else bool(args.lm)
     chunk_s = chunk_s if args.chunk_s is None else args.chunk_s
@@ -271,6 +460,9 @@ def main() -> None:
         speak_bin=project / "bin/medasr-speak",
         voice=args.voice,
         chunk_s=chunk_s,
+        precision=precision,
+        int8=int8,
+        autocast=autocast,
     )
 
     assistant.run()
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+
+@lru_cache(maxsize=1)
+def _load(path: str) -> dict[str, Any]:
+    import yaml
+
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+
+    return yaml.load(Path(path).read_text(), Loader=Loader) or {}
+
+
+def load_config(path: Path) -> dict[str, Any]:
+    return _load(str(path))
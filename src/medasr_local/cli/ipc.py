@@ -1,12 +1,36 @@
 from __future__ import annotations
 
 import json
+import sys
 import time
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def read_jsonl(stream) -> Any:
+    line = stream.readline()
+    if not line:
+        return None
+    line = line.strip()
+    if not line:
+        return {}
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
 
 def emit(event: dict[str, Any]) -> None:
-    print(json.dumps(event, ensure_ascii=False), flush=True)
+    if orjson is None:
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+        return
+    # Frames stay newline-delimited: the macOS app reads stdout line by line.
+    sys.stdout.flush()
+    sys.stdout.buffer.write(orjson.dumps(event) + b"\n")
+    sys.stdout.buffer.flush()
 
 
 def emit_status(message: str, **extra: Any) -> None:
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from medasr_local.cli.ipc import emit, emit_error, emit_status
+from medasr_local.cli.ipc import emit, emit_error, emit_status, read_jsonl
+from medasr_local.qa.medgemma import QUANT_MODES
 from medasr_local.qa.medgemma_multimodal import MedGemmaMultimodal, load_images
 
 _SESSIONS: dict[str, dict[str, Any]] = {}
@@ -23,16 +24,6 @@ def _get_session(req: dict[str, Any]) -> dict[str, Any]:
     return session
 
 
-def _read_jsonl(stdin) -> Any:
-    line = stdin.readline()
-    if not line:
-        return None
-    line = line.strip()
-    if not line:
-        return {}
-    return json.loads(line)
-
-
 def _write_json(obj: dict[str, Any]) -> None:
     emit(obj)
 
@@ -76,6 +67,26 @@ def _validate_local_model_dir(path: str) -> None:
         )
 
 
+@lru_cache(maxsize=1024)
+def _resolve_image(raw: str, repo_root: Path) -> Path:
+    image_path = Path(raw)
+    if not image_path.is_absolute():
+        image_path = (repo_root / image_path).resolve()
+    return image_path
+
+
+@lru_cache(maxsize=8)
+def _load_images_cached(path: str, mtime_ns: int, max_tiles: int) -> tuple:
+    return tuple(load_images(Path(path), max_tiles=max_tiles))
+
+
+def _images(image_path: Path, max_tiles: int) -> list[object]:
+    # Decoded ndarrays are shared across requests and never written to.
+    # Keyed on mtime so an image replaced on disk is decoded again.
+    mtime_ns = image_path.stat().st_mtime_ns
+    return list(_load_images_cached(str(image_path), mtime_ns, max_tiles))
+
+
 def handle_request(
     mm: MedGemmaMultimodal,
     req: dict[str, Any],
@@ -85,15 +96,13 @@ def handle_request(
     session = _get_session(req)
 
     if task == "path_report":
-        image_path = Path(str(req.get("image_path") or ""))
-        if not image_path.is_absolute():
-            image_path = (repo_root / image_path).resolve()
+        image_path = _resolve_image(str(req.get("image_path") or ""), repo_root)
         question = str(
             req.get("question") or "Describe the key morphology and likely diagnosis."
         )
         max_tokens = int(req.get("max_tokens") or 512)
 
-        imgs = load_images(image_path, max_tiles=int(req.get("max_tiles") or 4))
+        imgs = _images(image_path, max_tiles=int(req.get("max_tiles") or 4))
         content = [{"type": "image"} for _ in range(len(imgs))] + [
             {"type": "text", "text": question}
         ]
@@ -110,9 +119,7 @@ def handle_request(
         return {"ok": True, "answer": answer}
 
     if task == "tutor_next":
-        image_path = Path(str(req.get("image_path") or ""))
-        if not image_path.is_absolute():
-            image_path = (repo_root / image_path).resolve()
+        image_path = _resolve_image(str(req.get("image_path") or ""), repo_root)
 
         topic = req.get("topic")
         question = (
@@ -124,7 +131,7 @@ def handle_request(
 
         session["image_path"] = str(image_path)
 
-        imgs = load_images(image_path, max_tiles=1)
+        imgs = _images(image_path, max_tiles=1)
         content = [{"type": "image"} for _ in range(len(imgs))] + [
             {"type": "text", "text": question}
         ]
@@ -142,10 +149,9 @@ def handle_request(
         return {"ok": True, "question": out}
 
     if task == "tutor_grade":
-        image_path_str = str(req.get("image_path") or session.get("image_path") or "")
-        image_path = Path(image_path_str)
-        if not image_path.is_absolute():
-            image_path = (repo_root / image_path).resolve()
+        image_path = _resolve_image(
+            str(req.get("image_path") or session.get("image_path") or ""), repo_root
+        )
 
         prompt = str(req.get("prompt") or session.get("last_question") or "")
         user_answer = str(req.get("user_answer") or req.get("student_answer") or "")
@@ -163,7 +169,7 @@ def handle_request(
             "Key points: <3 bullets>"
         )
 
-        imgs = load_images(image_path, max_tiles=1)
+        imgs = _images(image_path, max_tiles=1)
         content = [{"type": "image"} for _ in range(len(imgs))] + [
             {"type": "text", "text": f"Question: {prompt}"},
             {"type": "text", "text": f"User answer: {user_answer}"},
@@ -182,10 +188,9 @@ def handle_request(
         return {"ok": True, "grading": out}
 
     if task == "tutor_reveal":
-        image_path_str = str(req.get("image_path") or session.get("image_path") or "")
-        image_path = Path(image_path_str)
-        if not image_path.is_absolute():
-            image_path = (repo_root / image_path).resolve()
+        image_path = _resolve_image(
+            str(req.get("image_path") or session.get("image_path") or ""), repo_root
+        )
 
         max_tokens = int(req.get("max_tokens") or 384)
 
@@ -194,7 +199,7 @@ def handle_request(
             "Be explicit about uncertainty and limitations. Keep it concise."
         )
 
-        imgs = load_images(image_path, max_tiles=1)
+        imgs = _images(image_path, max_tiles=1)
         content = [{"type": "image"} for _ in range(len(imgs))] + [
             {"type": "text", "text": reveal_prompt}
         ]
@@ -218,6 +223,12 @@ def main() -> None:
         description="Persistent MedGemma multimodal service (JSONL in/out)."
     )
     parser.add_argument("--model", default="models/medgemma")
+    parser.add_argument(
+        "--quant",
+        choices=QUANT_MODES,
+        default="none",
+        help="Weight quantization (int8: CUDA bitsandbytes or CPU dynamic; nf4: CUDA)",
+    )
     args = parser.parse_args()
 
     repo_root = Path(__file__).resolve().parents[3]
@@ -238,7 +249,7 @@ def main() -> None:
     t0 = time.time()
     emit_status("loading_medgemma_multimodal")
     try:
-        mm = MedGemmaMultimodal(model_name=args.model)
+        mm = MedGemmaMultimodal(model_name=args.model, quant=args.quant)
     except Exception as e:
         emit_error("mm_service_init_failed", detail=str(e))
         raise SystemExit(1)
@@ -247,7 +258,7 @@ def main() -> None:
 
     while True:
         try:
-            req = _read_jsonl(sys.stdin)
+            req = read_jsonl(sys.stdin)
         except Exception as e:
             emit_error("invalid_json", detail=str(e))
             continue
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+from medasr_local.cli.ipc import emit, emit_error, emit_status, read_jsonl
+from medasr_local.qa.medgemma import MedGemma
+
+
+def serve(qa: MedGemma, default_max_tokens: int) -> None:
+    while True:
+        try:
+            req = read_jsonl(sys.stdin)
+        except Exception as e:
+            emit_error("invalid_json", detail=str(e))
+            continue
+
+        if req is None:
+            break
+
+        req_id = req.get("id")
+        if not req_id:
+            req_id = "req_" + str(int(time.time() * 1000))
+
+        context = str(req.get("context", ""))
+        question = str(req.get("question", ""))
+
+        if not question.strip():
+            emit_error("request_failed", id=req_id, detail="Missing question")
+            continue
+
+        try:
+            max_tokens = int(req.get("max_tokens") or default_max_tokens)
+            answer = qa.ask(context, question, max_tokens=max_tokens)
+            emit({"type": "result", "id": req_id, "ok": True, "answer": answer})
+        except Exception as e:
+            emit_error("request_failed", id=req_id, detail=str(e))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Persistent MedGemma transcript Q&A service (JSONL in/out)."
+    )
+    parser.add_argument("--model", default="models/medgemma")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    args = parser.parse_args()
+
+    env = os.environ
+    env["TOKENIZERS_PARALLELISM"] = "false"
+    env["HF_HUB_DISABLE_TELEMETRY"] = "1"
+    env["TRANSFORMERS_VERBOSITY"] = "error"
+    env["HF_HUB_OFFLINE"] = "1"
+    env["TRANSFORMERS_OFFLINE"] = "1"
+
+    if not Path(args.model).exists():
+        emit_error("qa_service_init_failed", detail=f"Model not found: {args.model}")
+        raise SystemExit(1)
+
+    t0 = time.time()
+    emit_status("loading_medgemma")
+    try:
+        qa = MedGemma(model_name=args.model)
+    except Exception as e:
+        emit_error("qa_service_init_failed", detail=str(e))
+        raise SystemExit(1)
+
+    emit_status("ready", load_s=time.time() - t0)
+
+    serve(qa, args.max_tokens)
+
+
+if __name__ == "__main__":
+    main()
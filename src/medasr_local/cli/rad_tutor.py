@@ -3,6 +3,8 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+from collections import deque
+from collections.abc import Iterable
 from pathlib import Path
 
 from medasr_local.qa.medgemma_multimodal import MedGemmaMultimodal, load_images
@@ -19,20 +21,21 @@ Rules:
 - Keep the conversation educational and concise.
 """
 
+_HISTORY_TURNS = 6
 
-def _history_text(history: list[tuple[str, str, str]]) -> str:
-    if not history:
-        return ""
-    lines: list[str] = []
-    for idx, (question, user_answer, feedback) in enumerate(history[-6:], start=1):
-        lines.append(f"Q{idx}: {question}")
-        lines.append(f"A{idx}: {user_answer}")
-        lines.append(f"F{idx}: {feedback}")
-        lines.append("")
-    return "\n".join(lines).strip()
+
+def _history_text(history: Iterable[tuple[str, str, str]]) -> str:
+    recent = list(history)[-_HISTORY_TURNS:]
+    blocks = [
+        f"Q{idx}: {question}\nA{idx}: {user_answer}\nF{idx}: {feedback}"
+        for idx, (question, user_answer, feedback) in enumerate(recent, start=1)
+    ]
+    return "\n\n".join(blocks).strip()
 
 
-def _tutor_next_prompt(topic: str | None, history: list[tuple[str, str, str]]) -> str:
+def _tutor_next_prompt(
+    topic: str | None, history: Iterable[tuple[str, str, str]]
+) -> str:
     intro = (
         f"Generate the next teaching question about: {topic}"
         if topic
@@ -64,7 +67,7 @@ def _grade_prompt(question: str, user_answer: str) -> str:
     )
 
 
-def _reveal_prompt(history: list[tuple[str, str, str]]) -> str:
+def _reveal_prompt(history: Iterable[tuple[str, str, str]]) -> str:
     prev = _history_text(history)
     if prev:
         prev = "\n\nSession so far:\n" + prev
@@ -89,7 +92,8 @@ def _generate_one(mm: MedGemmaMultimodal, imgs, prompt: str, max_tokens: int) ->
 def interactive_session(
     mm: MedGemmaMultimodal, imgs, topic: str | None, max_tokens: int
 ) -> None:
-    history: list[tuple[str, str, str]] = []
+    # Prompts only ever show the last few turns.
+    history: deque[tuple[str, str, str]] = deque(maxlen=_HISTORY_TURNS)
 
     print("Type your answer and press Enter.")
     print("Commands: /reveal, /skip, /quit")
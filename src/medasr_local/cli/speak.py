@@ -2,41 +2,186 @@ from __future__ import annotations
 
 import argparse
 import os
+import queue
+import re
 import subprocess
+import sys
+import tempfile
+import threading
 from pathlib import Path
 
-from medasr_local.tts.pocket import synth_to_temp_wav
+import numpy as np
+
+from medasr_local.cli.ipc import emit, emit_error, emit_status, read_jsonl
+from medasr_local.tts.pocket import PocketTts, write_wav_float32
+
+_SENTENCE_RE = re.compile(r"(?<=[.?!])\s+")
+
+
+def _play(audio: np.ndarray, sample_rate: int, wav_path: Path | None) -> None:
+    try:
+        import sounddevice as sd
+    except ImportError:
+        sd = None
+
+    if sd is not None:
+        try:
+            sd.play(audio, sample_rate)
+            sd.wait()
+            return
+        except sd.PortAudioError:
+            pass
+
+    if wav_path is not None:
+        subprocess.run(["afplay", str(wav_path)], check=False)
+        return
+
+    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+    tmp_wav = Path(tmp.name)
+    tmp.close()
+    try:
+        write_wav_float32(tmp_wav, sample_rate, audio)
+        subprocess.run(["afplay", str(tmp_wav)], check=False)
+    finally:
+        try:
+            os.remove(tmp_wav)
+        except OSError:
+            pass
+
+
+def _stream_sentences(tts: PocketTts, text: str, out) -> None:
+    # Synthesize sentence by sentence on a worker so the next sentence is
+    # being generated while the previous one plays.
+    pending: queue.Queue = queue.Queue()
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for sentence in _SENTENCE_RE.split(text):
+                if stop.is_set():
+                    break
+                if sentence.strip():
+                    pending.put(tts.synth(sentence))
+        except Exception as e:
+            pending.put(e)
+        pending.put(None)
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            out.write(item.astype(np.float32, copy=False).reshape(-1, 1))
+    finally:
+        # On a playback error, let the worker finish its current sentence only.
+        stop.set()
+        worker.join()
+
+
+def _open_output(sample_rate: int):
+    try:
+        import sounddevice as sd
+    except ImportError:
+        return None
+
+    try:
+        stream = sd.OutputStream(samplerate=sample_rate, channels=1, dtype="float32")
+        stream.start()
+    except sd.PortAudioError:
+        return None
+    return stream
+
+
+def _serve(voice: str) -> None:
+    try:
+        tts = PocketTts(voice=voice)
+    except Exception as e:
+        emit_error("speak_service_init_failed", detail=str(e))
+        raise SystemExit(1)
+
+    # One output stream for the whole session; answers are written into it
+    # instead of reopening the audio device per utterance.
+    out = _open_output(tts.sample_rate)
+
+    emit_status("ready")
+
+    try:
+        while True:
+            try:
+                req = read_jsonl(sys.stdin)
+            except Exception as e:
+                emit_error("invalid_json", detail=str(e))
+                continue
+
+            if req is None:
+                break
+            if not req:
+                continue
+
+            req_id = req.get("id")
+            text = str(req.get("text") or "").strip()
+            try:
+                if text and out is not None:
+                    _stream_sentences(tts, text, out)
+                elif text:
+                    _play(tts.synth(text), tts.sample_rate, None)
+                emit({"type": "result", "id": req_id, "ok": True})
+            except Exception as e:
+                emit_error("speak_failed", id=req_id, detail=str(e))
+    finally:
+        if out is not None:
+            out.stop()
+            out.close()
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("text", nargs="+", help="Text to speak")
+    parser.add_argument("text", nargs="*", help="Text to speak")
     parser.add_argument("--voice", default="alba")
     parser.add_argument("--no-play", action="store_true")
     parser.add_argument("--out", help="Write wav to this path")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the voice loaded and speak JSONL {text} requests from stdin",
+    )
     args = parser.parse_args()
 
+    if args.serve:
+        _serve(args.voice)
+        return
+
     text = " ".join(args.text).strip()
     if not text:
         raise SystemExit(2)
 
-    tmp_wav: Path | None = None
-    try:
-        tmp_wav, _ = synth_to_temp_wav(text=text, voice=args.voice)
+    tts = PocketTts(voice=args.voice)
 
-        if args.out:
-            out = Path(args.out)
-            out.write_bytes(tmp_wav.read_bytes())
+    if not args.out and not args.no_play:
+        # Nothing needs the whole clip, so play sentences as they are made.
+        # Without a usable output device this falls through to _play.
+        stream = _open_output(tts.sample_rate)
+        if stream is not None:
+            try:
+                _stream_sentences(tts, text, stream)
+            finally:
+                stream.stop()
+                stream.close()
+            return
 
-        if not args.no_play:
-            subprocess.run(["afplay", str(tmp_wav)], check=False)
+    audio = tts.synth(text)
 
-    finally:
-        if tmp_wav is not None and tmp_wav.exists():
-            try:
-                os.remove(tmp_wav)
-            except OSError:
-                pass
+    out: Path | None = None
+    if args.out:
+        out = Path(args.out)
+        write_wav_float32(out, tts.sample_rate, audio)
+
+    if not args.no_play:
+        _play(audio, tts.sample_rate, out)
 
 
 if __name__ == "__main__":
@@ -8,20 +8,29 @@ from pathlib import Path
 import numpy as np
 
 from medasr_local.asr.decode import transcribe_audio
-from medasr_local.asr.model import load_asr
+from medasr_local.asr.io import pcm_to_float32
+from medasr_local.asr.model import PRECISIONS, load_asr
 from medasr_local.cli.ipc import emit, emit_error, emit_status
 
 
 def _iter_pcm16le_frames(stream, bytes_per_read: int):
+    # Reads land in one reused int16 buffer, so each frame must be consumed
+    # before the next is requested. A trailing odd byte is carried over to
+    # keep later samples aligned.
+    buf = np.empty(bytes_per_read // 2, dtype=np.int16)
+    raw = memoryview(buf).cast("B")
+    carry = 0
     while True:
-        chunk = stream.read(bytes_per_read)
-        if not chunk:
+        n = stream.readinto(raw[carry:])
+        if not n:
             return
-        if len(chunk) % 2 != 0:
-            chunk = chunk[:-1]
-        if not chunk:
-            continue
-        yield np.frombuffer(chunk, dtype=np.int16)
+        n += carry
+        carry = n & 1
+        n -= carry
+        if n:
+            yield buf[: n // 2]
+        if carry:
+            raw[0] = raw[n]
 
 
 def main() -> None:
@@ -47,6 +56,28 @@ def main() -> None:
         default=16000,
         help="Input PCM sample rate (must match source)",
     )
+    parser.add_argument(
+        "--precision",
+        choices=sorted(PRECISIONS),
+        default="fp32",
+        help="Model weight precision on CUDA/MPS (default: fp32)",
+    )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Dynamically quantize Linear layers (or the ONNX graph) to int8 on CPU",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx"],
+        default="torch",
+        help="CTC inference backend; onnx runs through ONNX Runtime (default: torch)",
+    )
+    parser.add_argument(
+        "--autocast",
+        action="store_true",
+        help="Run fp32 weights under fp16 autocast on CUDA/MPS",
+    )
     parser.add_argument(
         "--format",
         choices=["jsonl"],
@@ -73,7 +104,18 @@ def main() -> None:
 
     emit_status("loading_asr", model=model_name)
     try:
-        bundle = load_asr(model_name)
+        if args.backend == "onnx":
+            from medasr_local.asr.model_ort import load_asr_ort
+
+            bundle = load_asr_ort(model_name, int8=args.int8)
+        else:
+            bundle = load_asr(
+                model_name,
+                precision=args.precision,
+                int8=args.int8,
+                autocast=args.autocast,
+                fixed_shapes=True,
+            )
     except Exception as e:
         emit_error(
             "model_load_failed",
@@ -113,19 +155,31 @@ def main() -> None:
         use_lm=use_lm,
     )
 
-    audio_buf = np.array([], dtype=np.float32)
-
     stdin = getattr(sys.stdin, "buffer", sys.stdin)
     bytes_per_read = sample_rate * 2
 
+    # Fixed buffer with read/write offsets; pending audio is compacted to the
+    # front only when a new read would run past the end.
+    audio_buf = np.empty(2 * chunk_samples + bytes_per_read // 2, dtype=np.float32)
+    read_idx = 0
+    write_idx = 0
+
     last_emit_ts = 0.0
     for frame_i16 in _iter_pcm16le_frames(stdin, bytes_per_read=bytes_per_read):
-        audio = frame_i16.astype(np.float32) / 32768.0
-        audio_buf = np.concatenate([audio_buf, audio])
+        n = frame_i16.size
+        if write_idx + n > audio_buf.size:
+            pending = write_idx - read_idx
+            audio_buf[:pending] = audio_buf[read_idx:write_idx]
+            read_idx = 0
+            write_idx = pending
+        pcm_to_float32(
+            frame_i16, 1.0 / 32768.0, out=audio_buf[write_idx : write_idx + n]
+        )
+        write_idx += n
 
-        while audio_buf.size >= chunk_samples:
-            chunk = audio_buf[:chunk_samples]
-            audio_buf = audio_buf[hop_samples:]
+        while write_idx - read_idx >= chunk_samples:
+            chunk = audio_buf[read_idx : read_idx + chunk_samples]
+            read_idx += hop_samples
 
             t0 = time.perf_counter()
             try:
@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import os
-import tempfile
 from pathlib import Path
+from typing import Any
 
-from medasr_local.asr.decode import transcribe_segments
-from medasr_local.asr.io import extract_to_wav, read_wav, vad_segments
-from medasr_local.asr.lm import build_kenlm_decoder
-from medasr_local.asr.model import load_asr
+from medasr_local.asr.decode import LmPool, transcribe_segments
+from medasr_local.asr.io import extract_audio, vad_segments
+from medasr_local.asr.lm import load_kenlm_decoder
+from medasr_local.asr.model import AsrBundle, load_asr
+from medasr_local.cli.config import load_config
 from medasr_local.formats.writers import write_json, write_srt, write_txt, write_vtt
 
 
@@ -23,72 +23,79 @@ def _base_output(input_path: Path, output: str | None) -> Path:
 
 def _transcribe_one(
     input_path: Path,
-    model_name: str,
-    kenlm_path: Path,
-    use_lm: bool,
+    bundle: AsrBundle,
+    decoder: Any | None,
     txt: bool,
     json_out: bool,
     vtt: bool,
     srt: bool,
     output: str | None,
+    batch_size: int = 8,
+    pool: LmPool | None = None,
 ) -> None:
-    tmp_wav: Path | None = None
-    try:
-        tmp_wav = extract_to_wav(input_path)
-        audio = read_wav(tmp_wav)
-        if audio.sample_rate != 16000:
-            raise RuntimeError(f"Expected 16kHz audio, got {audio.sample_rate}")
-
-        segments_idx = vad_segments(audio.samples, audio.sample_rate)
-        if not segments_idx:
-            segments_idx = [(0, len(audio.samples))]
-
-        bundle = load_asr(model_name)
-
-        decoder = None
-        if use_lm:
-            decoder = build_kenlm_decoder(
-                bundle.processor, bundle.model, str(kenlm_path)
-            )
-
-        segments = transcribe_segments(
-            audio.samples,
-            audio.sample_rate,
-            segments_idx,
-            bundle,
-            decoder,
-        )
-
-        base = _base_output(input_path, output)
-
-        if json_out:
-            write_json(segments, base.with_suffix(".json"))
-        if txt:
-            write_txt(segments, base.with_suffix(".txt"))
-        if vtt:
-            write_vtt(segments, base.with_suffix(".vtt"))
-        if srt:
-            write_srt(segments, base.with_suffix(".srt"))
-
-    finally:
-        if tmp_wav is not None and tmp_wav.exists():
-            try:
-                os.remove(tmp_wav)
-            except OSError:
-                pass
+    audio = extract_audio(input_path)
+
+    segments_idx = vad_segments(audio.samples, audio.sample_rate)
+    if not segments_idx:
+        segments_idx = [(0, len(audio.samples))]
+
+    segments = transcribe_segments(
+        audio.samples,
+        audio.sample_rate,
+        segments_idx,
+        bundle,
+        decoder,
+        batch_size=batch_size,
+        pool=pool,
+    )
+
+    base = _base_output(input_path, output)
+
+    if json_out:
+        write_json(segments, base.with_suffix(".json"))
+    if txt:
+        write_txt(segments, base.with_suffix(".txt"))
+    if vtt:
+        write_vtt(segments, base.with_suffix(".vtt"))
+    if srt:
+        write_srt(segments, base.with_suffix(".srt"))
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("input", nargs="+", help="Audio/video file(s)")
+    parser.add_argument("input", nargs="*", help="Audio/video file(s)")
+    parser.add_argument(
+        "--input-list",
+        help="Text file with one audio/video path per line",
+    )
     parser.add_argument("-o", "--output", help="Output base file or directory")
     parser.add_argument("--no-lm", action="store_true")
     parser.add_argument("--txt", action="store_true")
     parser.add_argument("--json", action="store_true")
     parser.add_argument("--vtt", action="store_true")
     parser.add_argument("--srt", action="store_true")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="VAD segments per batched forward pass (default: 8)",
+    )
     args = parser.parse_args()
 
+    if args.batch_size < 1:
+        parser.error("--batch-size must be >= 1")
+
+    inputs = list(args.input)
+    if args.input_list:
+        lines = Path(args.input_list).read_text().splitlines()
+        inputs.extend(line.strip() for line in lines if line.strip())
+    if not inputs:
+        parser.error("no input files given")
+
+    for p in inputs:
+        if not Path(p).exists():
+            raise SystemExit(f"File not found: {p}")
+
     project = Path(__file__).resolve().parents[3]
     config_path = project / "config.yaml"
 
@@ -96,9 +103,7 @@ def main() -> None:
     kenlm_path = project / "models" / "lm_6.kenlm"
 
     if config_path.exists():
-        import yaml
-
-        cfg = yaml.safe_load(config_path.read_text())
+        cfg = load_config(config_path)
         model_name = cfg.get("models", {}).get("medasr", model_name)
         if (project / model_name).exists():
             model_name = str((project / model_name).resolve())
@@ -110,21 +115,29 @@ def main() -> None:
     vtt = args.vtt
     srt = args.srt
 
-    for p in args.input:
-        input_path = Path(p)
-        if not input_path.exists():
-            raise SystemExit(f"File not found: {p}")
-        _transcribe_one(
-            input_path,
-            model_name=model_name,
-            kenlm_path=kenlm_path,
-            use_lm=(not args.no_lm),
-            txt=txt,
-            json_out=json_out,
-            vtt=vtt,
-            srt=srt,
-            output=args.output,
-        )
+    decoder = None
+    if not args.no_lm:
+        decoder = load_kenlm_decoder(model_name, str(kenlm_path))
+    pool = LmPool() if decoder is not None else None
+
+    try:
+        bundle = load_asr(model_name)
+        for p in inputs:
+            _transcribe_one(
+                Path(p),
+                bundle,
+                decoder,
+                txt=txt,
+                json_out=json_out,
+                vtt=vtt,
+                srt=srt,
+                output=args.output,
+                batch_size=args.batch_size,
+                pool=pool,
+            )
+    finally:
+        if pool is not None:
+            pool.close()
 
 
 if __name__ == "__main__":
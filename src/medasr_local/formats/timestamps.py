@@ -10,27 +10,32 @@ class Segment:
     text: str
 
 
+_D2 = [f"{i:02d}" for i in range(100)]
+_D3 = [f"{i:03d}" for i in range(1000)]
+
+
+def _hours(hours: int) -> str:
+    return _D2[hours] if hours < 100 else str(hours)
+
+
 def hms(seconds: float) -> str:
-    whole = int(seconds)
-    hours = whole // 3600
-    minutes = (whole % 3600) // 60
-    secs = whole % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    hours, rem = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rem, 60)
+    return _hours(hours) + ":" + _D2[minutes] + ":" + _D2[secs]
+
+
+def _split_ms(seconds: float) -> tuple[int, int, int, int]:
+    hours, rem = divmod(int(seconds * 1000.0 + 0.5), 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    secs, ms = divmod(rem, 1000)
+    return hours, minutes, secs, ms
 
 
 def vtt_ts(seconds: float) -> str:
-    ms_total = int(round(seconds * 1000.0))
-    hours = ms_total // 3_600_000
-    minutes = (ms_total % 3_600_000) // 60_000
-    secs = (ms_total % 60_000) // 1000
-    ms = ms_total % 1000
-    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{ms:03d}"
+    hours, minutes, secs, ms = _split_ms(seconds)
+    return _hours(hours) + ":" + _D2[minutes] + ":" + _D2[secs] + "." + _D3[ms]
 
 
 def srt_ts(seconds: float) -> str:
-    ms_total = int(round(seconds * 1000.0))
-    hours = ms_total // 3_600_000
-    minutes = (ms_total % 3_600_000) // 60_000
-    secs = (ms_total % 60_000) // 1000
-    ms = ms_total % 1000
-    return f"{hours:02d}:{minutes:02d}:{secs:02d},{ms:03d}"
+    hours, minutes, secs, ms = _split_ms(seconds)
+    return _hours(hours) + ":" + _D2[minutes] + ":" + _D2[secs] + "," + _D3[ms]
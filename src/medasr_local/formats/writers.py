@@ -5,6 +5,11 @@ from pathlib import Path
 
 from medasr_local.formats.timestamps import Segment, hms, srt_ts, vtt_ts
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def write_json(segments: list[Segment], path: Path) -> None:
     payload = {
@@ -14,6 +19,9 @@ def write_json(segments: list[Segment], path: Path) -> None:
             if s.text
         ]
     }
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2) + b"\n")
+        return
     path.write_text(json.dumps(payload, indent=2) + "\n")
 
 
@@ -23,25 +31,18 @@ def write_txt(segments: list[Segment], path: Path) -> None:
 
 
 def write_vtt(segments: list[Segment], path: Path) -> None:
-    lines: list[str] = ["WEBVTT", ""]
-    for s in segments:
-        if not s.text:
-            continue
-        lines.append(f"{vtt_ts(s.start_s)} --> {vtt_ts(s.end_s)}")
-        lines.append(s.text)
-        lines.append("")
-    path.write_text("\n".join(lines).rstrip() + "\n")
+    # One string per cue instead of an append per line.
+    cues = "".join(
+        f"{vtt_ts(s.start_s)} --> {vtt_ts(s.end_s)}\n{s.text}\n\n"
+        for s in segments
+        if s.text
+    )
+    path.write_text(("WEBVTT\n\n" + cues).rstrip() + "\n")
 
 
 def write_srt(segments: list[Segment], path: Path) -> None:
-    lines: list[str] = []
-    idx = 1
-    for s in segments:
-        if not s.text:
-            continue
-        lines.append(str(idx))
-        lines.append(f"{srt_ts(s.start_s)} --> {srt_ts(s.end_s)}")
-        lines.append(s.text)
-        lines.append("")
-        idx += 1
-    path.write_text("\n".join(lines).rstrip() + "\n")
+    cues = "".join(
+        f"{idx}\n{srt_ts(s.start_s)} --> {srt_ts(s.end_s)}\n{s.text}\n\n"
+        for idx, s in enumerate((seg for seg in segments if seg.text), start=1)
+    )
+    path.write_text(cues.rstrip() + "\n")
@@ -2,9 +2,15 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+import copy
+import hashlib
+import importlib.util
+import mmap
+import os
 import re
 
 import torch
+from transformers import StoppingCriteria
 
 
 @dataclass(frozen=True)
@@ -15,6 +21,9 @@ class MedGemmaConfig:
 
 
 _UNUSED_TOKEN_RE = re.compile(r"<unused\d+>")
+_TIMESTAMP_RE = re.compile(rb"(?m)^[ \t]*\[[^\]\n]*\]\s*")
+# Numbered or bulleted reasoning lines, removed whole (with their newline).
+_LIST_LINE_RE = re.compile(r"(?m)^[^\S\n]*(?:\d+\.|[-*])[^\S\n]+.*\n?")
 
 
 def _clean_response(text: str) -> str:
@@ -23,13 +32,8 @@ def _clean_response(text: str) -> str:
         return ""
 
     if raw.lower().startswith("thought"):
-        lines = raw.splitlines()[1:]
-        cleaned_lines: list[str] = []
-        for line in lines:
-            if re.match(r"^\s*(\d+\.|[-*])\s+", line):
-                continue
-            cleaned_lines.append(line)
-        cleaned = "\n".join(cleaned_lines).strip()
+        body = "\n".join(raw.splitlines()[1:])
+        cleaned = _LIST_LINE_RE.sub("", body).strip()
         if cleaned:
             return cleaned
 
@@ -44,50 +48,344 @@ def pick_device_dtype() -> tuple[str, torch.dtype]:
     return ("cpu", torch.float32)
 
 
+def _enable_tf32() -> None:
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+
+
+def pick_attn_implementation(device: str) -> str:
+    if device == "cuda" and importlib.util.find_spec("flash_attn") is not None:
+        return "flash_attention_2"
+    return "sdpa"
+
+
+QUANT_MODES = ("none", "int8", "nf4")
+
+
+def quantization_config(quant: str, device: str):
+    if quant not in QUANT_MODES:
+        raise ValueError(f"Unknown quant mode: {quant}")
+    if quant == "none":
+        return None
+    if quant == "int8" and device == "cpu":
+        # Applied after loading by quantize_weights (torch dynamic int8).
+        return None
+    if device != "cuda":
+        raise RuntimeError(f"quant={quant} requires CUDA (bitsandbytes)")
+
+    from transformers import BitsAndBytesConfig
+
+    if quant == "int8":
+        return BitsAndBytesConfig(load_in_8bit=True)
+    return BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.bfloat16,
+        bnb_4bit_quant_type="nf4",
+        bnb_4bit_use_double_quant=True,
+    )
+
+
+def quantize_weights(model, quant: str, device: str):
+    if quant == "int8" and device == "cpu":
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+_SYSTEM_PROMPT = (
+    "You are a helpful medical education assistant. "
+    "Answer questions based only on the provided context. "
+    "If the context doesn't contain the answer, say so clearly. "
+    "Output only a single line in the format: Answer: <text>. "
+    "Do not include reasoning or analysis."
+)
+
+
+def _prefix_prompt(context: str) -> str:
+    return f"{_SYSTEM_PROMPT}\n\nContext:\n\n{context}\n\n---\n\nQuestion:"
+
+
+def _prefix_key(
+    model_name: str, dtype: torch.dtype, device: str, quant: str, prompt: str
+) -> str:
+    # K/V depend on the weights as loaded, not just the checkpoint name.
+    raw = f"{model_name}\0{dtype}\0{device}\0{quant}\0{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_layers(cache) -> list[tuple[torch.Tensor, torch.Tensor]]:
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+def _load_prefix_layers(path: Path, key: str, device):
+    if not path.exists():
+        return None
+    try:
+        saved = torch.load(path, map_location=device, weights_only=True)
+    except Exception:
+        return None
+    if saved.get("key") != key:
+        return None
+    return saved["layers"]
+
+
+def _fill_cache(cache, layers) -> None:
+    # Same writes a prefill forward makes, so static caches (including their
+    # sliding-window layers) end up as if the prefix had just been run.
+    positions = torch.arange(layers[0][0].shape[-2], device=layers[0][0].device)
+    for layer_idx, (k, v) in enumerate(layers):
+        cache.update(k, v, layer_idx, {"cache_position": positions})
+
+
+def _save_prefix_cache(path: Path, key: str, cache, dtype: torch.dtype) -> None:
+    layers = [
+        (k.to("cpu", dtype=dtype), v.to("cpu", dtype=dtype))
+        for k, v in _cache_layers(cache)
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    torch.save({"key": key, "layers": layers}, tmp)
+    os.replace(tmp, path)
+
+
+def _snapshot_cache(cache):
+    # Whole tensors (prefix plus the zeroed tail) and any per-layer counters,
+    # so restoring yields exactly the freshly primed state.
+    tensors = [(k.clone(), v.clone()) for k, v in _cache_layers(cache)]
+    counters = [
+        {n: v for n, v in vars(layer).items() if isinstance(v, (bool, int))}
+        for layer in getattr(cache, "layers", [])
+    ]
+    return tensors, counters
+
+
+def _restore_cache(cache, snapshot) -> None:
+    tensors, counters = snapshot
+    for (k, v), (saved_k, saved_v) in zip(_cache_layers(cache), tensors):
+        k.copy_(saved_k)
+        v.copy_(saved_v)
+    for layer, state in zip(getattr(cache, "layers", []), counters):
+        for name, value in state.items():
+            setattr(layer, name, value)
+
+
+class _AnswerLineStop(StoppingCriteria):
+    # The prompt asks for a single "Answer: ..." line, so stop once a line of
+    # content is finished instead of running to max_new_tokens. Thought
+    # blocks span several lines and run to completion.
+    def __init__(self, tokenizer, prompt_len: int):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+
+    def _row_done(self, row: torch.Tensor) -> bool:
+        if "\n" not in self.tokenizer.decode(row[-1:]):
+            return False
+        text = self.tokenizer.decode(row[self.prompt_len :], skip_special_tokens=True)
+        text = _UNUSED_TOKEN_RE.sub("", text).lstrip()
+        return "\n" in text and not text.lower().startswith("thought")
+
+    def __call__(self, input_ids: torch.Tensor, scores, **kwargs) -> torch.BoolTensor:
+        done = [self._row_done(row) for row in input_ids]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+@dataclass(frozen=True)
+class _PrimedPrefix:
+    context: str
+    input_ids: torch.Tensor
+    cache: object
+    max_len: int | None
+    snapshot: object = None
+
+
 class MedGemma:
-    def __init__(self, model_name: str = "models/medgemma"):
+    def __init__(self, model_name: str = "models/medgemma", quant: str = "none"):
         from transformers import AutoModelForCausalLM, AutoTokenizer
 
         device, dtype = pick_device_dtype()
+        if device == "cuda":
+            _enable_tf32()
+        quant_config = quantization_config(quant, device)
 
         self.tokenizer = AutoTokenizer.from_pretrained(
-            model_name, local_files_only=True
+            model_name, use_fast=True, local_files_only=True
         )
         self.model = AutoModelForCausalLM.from_pretrained(
             model_name,
             torch_dtype=dtype,
             device_map="auto",
+            attn_implementation=pick_attn_implementation(device),
+            quantization_config=quant_config,
             local_files_only=True,
         )
+        self.model = quantize_weights(self.model, quant, device)
+        self.model_name = model_name
         self.device = device
         self.dtype = dtype
+        self.quant = quant
+
+        self.eos_token_id = self.tokenizer.eos_token_id
+        self.pad_token_id = self.tokenizer.eos_token_id
+
+        self._static_cache = False
+        self._work_cache = None
+        self._primed: _PrimedPrefix | None = None
+
+        if device == "cuda":
+            self._enable_static_cache(fullgraph=quant_config is None)
+
+    def _enable_static_cache(self, fullgraph: bool) -> None:
+        self._static_cache = True
+        self.model.forward = torch.compile(
+            self.model.forward, mode="reduce-overhead", fullgraph=fullgraph
+        )
+
+        warmup = self.tokenizer("Answer:", return_tensors="pt")
+        with torch.inference_mode():
+            self.model.generate(
+                warmup["input_ids"].to(self.model.device),
+                attention_mask=warmup["attention_mask"].to(self.model.device),
+                max_new_tokens=1,
+                do_sample=False,
+                pad_token_id=self.pad_token_id,
+                cache_implementation="static",
+            )
+
+    def _static_work_cache(self, max_len: int):
+        from transformers import StaticCache
+
+        # One cache for the whole session: its tensors keep their addresses,
+        # so the CUDA graphs recorded by reduce-overhead stay valid.
+        cache = self._work_cache
+        if cache is None or cache.max_cache_len < max_len:
+            cache = StaticCache(
+                config=self.model.config,
+                max_batch_size=1,
+                max_cache_len=max_len,
+                device=self.model.device,
+                dtype=self.dtype,
+            )
+            self._work_cache = cache
+        else:
+            cache.reset()
+        return cache
+
+    def _tokenize(self, text: str, add_special_tokens: bool = True) -> torch.Tensor:
+        ids = self.tokenizer(
+            text, return_tensors="pt", add_special_tokens=add_special_tokens
+        )["input_ids"]
+        return ids.to(self.model.device)
+
+    def prime(self, context: str, cache_path: Path | None = None) -> None:
+        from transformers import DynamicCache
 
-    def ask(self, context: str, question: str, max_tokens: int = 512) -> str:
-        system = (
-            "You are a helpful medical education assistant. "
-            "Answer questions based only on the provided context. "
-            "If the context doesn't contain the answer, say so clearly. "
-            "Output only a single line in the format: Answer: <text>. "
-            "Do not include reasoning or analysis."
+        prompt = _prefix_prompt(context)
+        prefix_ids = self._tokenize(prompt)
+
+        key = None
+        layers = None
+        if cache_path is not None:
+            key = _prefix_key(
+                self.model_name, self.dtype, self.device, self.quant, prompt
+            )
+            layers = _load_prefix_layers(cache_path, key, self.model.device)
+
+        max_len: int | None = None
+        snapshot = None
+        full = None
+        with torch.inference_mode():
+            if key is not None and layers is None:
+                # The file keeps every prefix position, which a static cache's
+                # sliding-window layers do not, so persist from a full prefill.
+                full = DynamicCache()
+                self.model(prefix_ids, past_key_values=full, use_cache=True)
+                _save_prefix_cache(cache_path, key, full, self.dtype)
+                layers = _cache_layers(full)
+
+            if self._static_cache:
+                cache = self._static_work_cache(prefix_ids.shape[1] + 1024)
+                max_len = cache.max_cache_len
+            else:
+                cache = full if full is not None else DynamicCache()
+
+            if cache is full:
+                pass
+            elif layers is not None:
+                _fill_cache(cache, layers)
+            else:
+                self.model(prefix_ids, past_key_values=cache, use_cache=True)
+            if self._static_cache:
+                snapshot = _snapshot_cache(cache)
+
+        self._primed = _PrimedPrefix(
+            context=context,
+            input_ids=prefix_ids,
+            cache=cache,
+            max_len=max_len,
+            snapshot=snapshot,
         )
 
-        user_prompt = f"Context:\n\n{context}\n\n---\n\nQuestion: {question}"
+    def ask(
+        self,
+        context: str,
+        question: str,
+        max_tokens: int = 512,
+        sample: bool = False,
+    ) -> str:
+        from transformers import StoppingCriteriaList
+
+        suffix = f" {question}\n\nAnswer:"
+
+        cache_kwargs: dict = {}
+        input_ids = None
+        reuse: _PrimedPrefix | None = None
+
+        primed = self._primed
+        if primed is not None and primed.context == context:
+            suffix_ids = self._tokenize(suffix, add_special_tokens=False)
+            input_ids = torch.cat([primed.input_ids, suffix_ids], dim=1)
+            total = input_ids.shape[1] + max_tokens
+            if primed.max_len is None or total <= primed.max_len:
+                reuse = primed
+            elif self._static_cache:
+                cache_kwargs["cache_implementation"] = "static"
 
-        prompt = f"{system}\n\n{user_prompt}\n\nAnswer:"
-        inputs = self.tokenizer(prompt, return_tensors="pt")
-        input_ids = inputs["input_ids"].to(self.model.device)
-        attention_mask = inputs.get("attention_mask")
-        if attention_mask is not None:
-            attention_mask = attention_mask.to(self.model.device)
+        if input_ids is None:
+            input_ids = self._tokenize(_prefix_prompt(context) + suffix)
+            if self._static_cache:
+                cache_kwargs["cache_implementation"] = "static"
 
-        with torch.no_grad():
+        attention_mask = torch.ones_like(input_ids)
+
+        if sample:
+            decoding = {"do_sample": True, "temperature": 0.7, "top_p": 0.9}
+        else:
+            decoding = {"do_sample": False, "num_beams": 1}
+
+        stop = StoppingCriteriaList(
+            [_AnswerLineStop(self.tokenizer, input_ids.shape[1])]
+        )
+
+        with torch.inference_mode():
+            if reuse is not None and reuse.snapshot is not None:
+                _restore_cache(reuse.cache, reuse.snapshot)
+                cache_kwargs["past_key_values"] = reuse.cache
+            elif reuse is not None:
+                cache_kwargs["past_key_values"] = copy.deepcopy(reuse.cache)
             outputs = self.model.generate(
                 input_ids,
                 attention_mask=attention_mask,
                 max_new_tokens=max_tokens,
-                do_sample=False,
-                eos_token_id=self.tokenizer.eos_token_id,
-                pad_token_id=self.tokenizer.eos_token_id,
+                use_cache=True,
+                eos_token_id=self.eos_token_id,
+                pad_token_id=self.pad_token_id,
+                stopping_criteria=stop,
+                **cache_kwargs,
+                **decoding,
             )
 
         response = self.tokenizer.decode(
@@ -100,20 +398,13 @@ class MedGemma:
 
 
 def load_transcript_text(path: Path, max_words: int | None = None) -> str:
-    lines = path.read_text().strip().split("\n")
-    text_lines = []
-
-    for line in lines:
-        if line.startswith("[") and "]" in line:
-            line = line[line.index("]") + 1 :].strip()
-        text_lines.append(line)
-
-    full_text = " ".join(text_lines)
-
-    if max_words is not None:
-        words = full_text.split()
-        if len(words) > max_words:
-            words = words[-max_words:]
-            return " ".join(words)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stripped = _TIMESTAMP_RE.sub(b"", mm)
 
-    return full_text
+    words = stripped.decode("utf-8").split()
+    if max_words is not None and len(words) > max_words:
+        words = words[-max_words:]
+    return " ".join(words)
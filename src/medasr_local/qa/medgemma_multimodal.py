@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
+import copy
 import math
 import os
 
+import numpy as np
 import torch
 
-from medasr_local.qa.medgemma import _clean_response, pick_device_dtype
+from medasr_local.qa.medgemma import (
+    _clean_response,
+    pick_device_dtype,
+    quantization_config,
+    quantize_weights,
+)
 
 
 @dataclass(frozen=True)
@@ -17,8 +25,18 @@ class MedGemmaMultimodalConfig:
     dtype: torch.dtype
 
 
+_FEATURE_CACHE_SIZE = 4
+
+
+@dataclass(frozen=True)
+class _PrefixCache:
+    images: tuple[object, ...]
+    input_ids: torch.Tensor
+    cache: object
+
+
 class MedGemmaMultimodal:
-    def __init__(self, model_name: str = "models/medgemma"):
+    def __init__(self, model_name: str = "models/medgemma", quant: str = "none"):
         from transformers import AutoProcessor, Gemma3ForConditionalGeneration
 
         os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
@@ -37,22 +55,22 @@ class MedGemmaMultimodal:
             local_files_only=True,
         )
 
-        if device == "cuda":
-            self.model = Gemma3ForConditionalGeneration.from_pretrained(
-                model_name,
-                torch_dtype=dtype,
-                device_map="auto",
-                local_files_only=True,
-            )
-        else:
-            self.model = Gemma3ForConditionalGeneration.from_pretrained(
-                model_name,
-                torch_dtype=dtype,
-                local_files_only=True,
-            )
-            self.model.to(device)
+        # Safetensors shards are memory-mapped and materialized directly on the
+        # target device, instead of being built on the CPU first and copied.
+        self.model = Gemma3ForConditionalGeneration.from_pretrained(
+            model_name,
+            torch_dtype=dtype,
+            device_map="auto" if device == "cuda" else {"": device},
+            low_cpu_mem_usage=True,
+            quantization_config=quantization_config(quant, device),
+            local_files_only=True,
+        )
+        self.model = quantize_weights(self.model, quant, device)
 
         self.model.eval()
+        self._prefix: _PrefixCache | None = None
+        self._features: OrderedDict[tuple[int, ...], tuple] = OrderedDict()
+        self._staging: dict[str, torch.Tensor] = {}
 
     def _tokenizer_eos(self) -> int | None:
         tok = getattr(self.processor, "tokenizer", None)
@@ -60,6 +78,78 @@ class MedGemmaMultimodal:
             return None
         return getattr(tok, "eos_token_id", None)
 
+    def _to_device(self, key: str, value: torch.Tensor) -> torch.Tensor:
+        device = self.model.device
+        if device.type != "cuda":
+            return value.to(device)
+        # Reused pinned host buffers let the H2D copy run asynchronously.
+        buf = self._staging.get(key)
+        if buf is None or buf.dtype != value.dtype or buf.numel() < value.numel():
+            buf = torch.empty(value.numel(), dtype=value.dtype, pin_memory=True)
+            self._staging[key] = buf
+        host = buf[: value.numel()].view(value.shape)
+        host.copy_(value)
+        return host.to(device, non_blocking=True)
+
+    def encode_images(
+        self, images: list[object], pixel_values: torch.Tensor
+    ) -> torch.Tensor:
+        # Entries hold the image objects, so their ids stay unique as keys.
+        key = tuple(id(img) for img in images)
+        hit = self._features.get(key)
+        if hit is not None:
+            self._features.move_to_end(key)
+            return hit[1]
+
+        features = self.model.get_image_features(
+            self._to_device("pixel_values", pixel_values)
+        )
+        self._features[key] = (tuple(images), features)
+        if len(self._features) > _FEATURE_CACHE_SIZE:
+            self._features.popitem(last=False)
+        return features
+
+    def _image_prefix_len(self, input_ids: torch.Tensor) -> int:
+        image_token = getattr(self.model.config, "image_token_index", None)
+        if image_token is None:
+            return 0
+        hits = (input_ids[0] == image_token).nonzero()
+        if hits.numel() == 0:
+            return 0
+        return int(hits[-1]) + 1
+
+    def _cached_prefix(self, inputs, images: list[object], prefix_len: int):
+        # System prompt + image soft tokens are identical across tutor turns on
+        # the same image; reuse their KV so only the new text is prefilled.
+        ids = inputs["input_ids"][:, :prefix_len]
+        entry = self._prefix
+        if (
+            entry is None
+            or len(entry.images) != len(images)
+            or any(a is not b for a, b in zip(entry.images, images))
+            or not torch.equal(entry.input_ids, ids)
+        ):
+            is_image = ids == self.model.config.image_token_index
+            embeds = self.model.get_input_embeddings()(ids.masked_fill(is_image, 0))
+            features = self.encode_images(images, inputs["pixel_values"])
+            embeds = embeds.masked_scatter(
+                is_image.unsqueeze(-1), features.to(embeds.device, embeds.dtype)
+            )
+            prefix_inputs = {
+                "inputs_embeds": embeds,
+                "attention_mask": inputs["attention_mask"][:, :prefix_len],
+            }
+            if "token_type_ids" in inputs:
+                prefix_inputs["token_type_ids"] = inputs["token_type_ids"][
+                    :, :prefix_len
+                ]
+            out = self.model(**prefix_inputs, use_cache=True)
+            entry = _PrefixCache(
+                images=tuple(images), input_ids=ids, cache=out.past_key_values
+            )
+            self._prefix = entry
+        return copy.deepcopy(entry.cache)
+
     def generate(
         self,
         messages: list[dict],
@@ -79,16 +169,33 @@ class MedGemmaMultimodal:
             padding=True,
         )
 
-        device = self.model.device
+        # pixel_values stay on the host until a vision-tower pass needs them;
+        # a prefix cache hit never does.
         for key, value in list(inputs.items()):
-            if hasattr(value, "to"):
-                inputs[key] = value.to(device)
+            if key != "pixel_values" and isinstance(value, torch.Tensor):
+                inputs[key] = self._to_device(key, value)
 
         eos = self._tokenizer_eos()
 
-        with torch.no_grad():
+        gen_inputs = dict(inputs)
+        prefix_len = self._image_prefix_len(inputs["input_ids"])
+
+        with torch.inference_mode():
+            if images and 0 < prefix_len < inputs["input_ids"].shape[1]:
+                gen_inputs["past_key_values"] = self._cached_prefix(
+                    inputs, images, prefix_len
+                )
+                # The images are already in the cache; the remaining suffix
+                # is plain text.
+                gen_inputs.pop("pixel_values", None)
+                gen_inputs.pop("token_type_ids", None)
+            elif "pixel_values" in inputs:
+                gen_inputs["pixel_values"] = self._to_device(
+                    "pixel_values", inputs["pixel_values"]
+                )
+
             outputs = self.model.generate(
-                **inputs,
+                **gen_inputs,
                 max_new_tokens=max_new_tokens,
                 do_sample=False,
                 eos_token_id=eos,
@@ -114,7 +221,7 @@ def load_images(
     *,
     max_tiles: int = 1,
     max_side_px: int = 2048,
-) -> list[object]:
+) -> list[np.ndarray]:
     from PIL import Image
 
     img = Image.open(path).convert("RGB")
@@ -125,20 +232,23 @@ def load_images(
         scale = max_side_px / float(max_side)
         img = img.resize((int(w * scale), int(h * scale)))
 
+    # Always HxWx3 ndarrays; the processor accepts them, so callers see one
+    # image type either way. Tiles are copied out contiguously so cached tiles
+    # do not keep the full-size array alive or force strided reads.
+    pixels = np.asarray(img)
     if max_tiles <= 1:
-        return [img]
+        return [pixels]
 
     grid = int(math.ceil(math.sqrt(max_tiles)))
-    w, h = img.size
+    h, w = pixels.shape[:2]
+    xs = [c * w // grid for c in range(grid + 1)]
+    ys = [r * h // grid for r in range(grid + 1)]
 
-    tiles: list[object] = []
+    tiles: list[np.ndarray] = []
     for r in range(grid):
         for c in range(grid):
             if len(tiles) >= max_tiles:
                 break
-            left = int(c * w / grid)
-            right = int((c + 1) * w / grid)
-            top = int(r * h / grid)
-            bottom = int((r + 1) * h / grid)
-            tiles.append(img.crop((left, top, right, bottom)))
+            tile = pixels[ys[r] : ys[r + 1], xs[c] : xs[c + 1]]
+            tiles.append(np.ascontiguousarray(tile))
     return tiles
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -34,14 +33,5 @@ class PocketTts:
 def write_wav_float32(path: Path, sample_rate: int, audio: np.ndarray) -> None:
     from scipy.io import wavfile
 
-    wavfile.write(str(path), sample_rate, audio.astype(np.float32))
+    wavfile.write(str(path), sample_rate, audio.astype(np.float32, copy=False))
 
-
-def synth_to_temp_wav(text: str, voice: str) -> tuple[Path, int]:
-    tts = PocketTts(voice=voice)
-    audio = tts.synth(text)
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    tmp_path = Path(tmp.name)
-    tmp.close()
-    write_wav_float32(tmp_path, tts.sample_rate, audio)
-    return tmp_path, tts.sample_rate